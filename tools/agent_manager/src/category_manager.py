@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 
 import yaml
-from typing import Dict, List, Set
+from typing import Dict, FrozenSet, List
 import os
+from yaml_loader import AgentLoader
 
 
 class CategoryManager:
@@ -17,24 +18,41 @@ class CategoryManager:
         """Load categories from YAML file."""
         try:
             with open(self.categories_file, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f)
+                data = yaml.load(f, Loader=AgentLoader)
                 if not isinstance(data, dict) or 'categories' not in data:
                     raise ValueError("Invalid categories file format")
-                return data['categories']
+            categories = data['categories']
+            # Derived lookups are built here so a malformed definition is
+            # reported as a loading error
+            self._valid_categories = frozenset(categories.keys())
+            self._categories_by_example = self._index_examples(categories)
+            return categories
         except Exception as e:
             raise ValueError(f"Error loading categories: {e}")
 
-    def get_valid_categories(self) -> Set[str]:
+    @staticmethod
+    def _index_examples(categories: Dict) -> Dict[str, List[str]]:
+        """Map each example name to the category keys that list it."""
+        by_example = {}
+        for key, info in categories.items():
+            examples = info.get('examples', [])
+            # Only lists of names are indexed
+            if not isinstance(examples, list):
+                continue
+            for example in set(examples):
+                by_example.setdefault(example, []).append(key)
+        return by_example
+
+    def get_valid_categories(self) -> FrozenSet[str]:
         """Get set of valid category keys."""
-        return set(self.categories.keys())
+        return self._valid_categories
 
     def validate_categories(self, categories: List[str]) -> bool:
         """
         Validate a list of categories against known valid categories.
         Returns True if all categories are valid, False otherwise.
         """
-        valid_categories = self.get_valid_categories()
-        return all(category in valid_categories for category in categories)
+        return self._valid_categories.issuperset(categories)
 
     def get_category_info(self, category: str) -> Dict:
         """Get information about a specific category."""
@@ -57,8 +75,4 @@ class CategoryManager:
         Find potential categories for an agent based on example matches.
         Returns a list of category keys where the agent name matches an example.
         """
-        matching_categories = []
-        for cat_key, cat_info in self.categories.items():
-            if agent_name in cat_info.get('examples', []):
-                matching_categories.append(cat_key)
-        return matching_categories
+        return list(self._categories_by_example.get(agent_name, []))
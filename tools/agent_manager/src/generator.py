@@ -1,10 +1,48 @@
 #!/usr/bin/env python3
 
+import hashlib
 import json
+import operator
 import os
-from typing import Dict, List, Tuple
+from dataclasses import dataclass, fields
+from typing import Dict, Iterable, Optional, Tuple
 from datetime import datetime, timezone
-from jsonschema import validate, ValidationError
+from jsonschema import Draft7Validator, ValidationError
+import json_io
+
+# C-level sort key for index entries
+_ID_KEY = operator.attrgetter("id")
+
+
+@dataclass(frozen=True, slots=True)
+class IndexEntry:
+    """A single agent entry in agent_index.json."""
+    id: str
+    name: str
+    filename: str
+    description: str
+    emoji: str
+    created_at: str
+    tags: Tuple[str, ...] = ()
+    author: Optional[str] = None
+    content_sha: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, entry: Dict) -> "IndexEntry":
+        """Build an entry from its JSON form, ignoring unknown keys."""
+        values = {f.name: entry[f.name] for f in fields(cls) if f.name in entry}
+        values["tags"] = tuple(values.get("tags", ()))
+        return cls(**values)
+
+    def to_dict(self) -> Dict:
+        """Return the JSON form of the entry, omitting unset optional fields."""
+        entry = {}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if value is not None:
+                entry[f.name] = value
+        entry["tags"] = list(self.tags)
+        return entry
 
 
 class IndexGenerator:
@@ -14,38 +52,86 @@ class IndexGenerator:
         """Initialize with path to JSON schema file."""
         self.json_schema_path = json_schema_path
         self.version = "1.0"
+        self.json_schema = self._load_schema()
 
-    def _create_entry(self, data: Dict, filename: str) -> Dict:
-        """Create an index entry from agent data."""
-        # Get ID from filename (remove .yaml extension)
-        agent_id = os.path.splitext(filename)[0]
+        # Build the validator once so each index generation skips schema compilation
+        Draft7Validator.check_schema(self.json_schema)
+        self._validator = Draft7Validator(self.json_schema)
 
-        entry = {
-            "id": agent_id,
-            "name": data["name"],
-            "filename": filename,
-            "description": data["description"],
-            "emoji": data["emoji"],
-            "created_at": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
-            "tags": data["tags"]
-        }
+        # Fingerprint of the last index that passed schema validation, persisted
+        # between runs so an unchanged index is not revalidated
+        self.fingerprint_path = '.agent_index.fp'
+        self._schema_digest = self._digest(self.json_schema)
+        self._last_validated_fingerprint = self._load_fingerprint()
 
-        # Add optional author field if present
-        if "author" in data and data["author"]:
-            entry["author"] = data["author"]
+    def _load_schema(self) -> Dict:
+        """Load the index JSON schema."""
+        try:
+            with open(self.json_schema_path, 'r', encoding='utf-8') as f:
+                return json_io.loads(f.read())
+        except Exception as e:
+            raise ValueError(f"Error loading index schema: {e}")
 
-        return entry
+    @staticmethod
+    def _digest(obj) -> str:
+        """Hash the canonical JSON form of an object."""
+        canonical = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
 
-    def generate_index(self, valid_data: List[Dict], valid_files: List[str]) -> Tuple[Dict, int, int]:
+    def _load_fingerprint(self) -> Optional[str]:
+        """Load the persisted fingerprint, if any."""
+        try:
+            with open(self.fingerprint_path, 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _fingerprint(self, index: Dict) -> str:
+        """Fingerprint an index together with the schema it is validated against."""
+        return self._digest([self._schema_digest, index])
+
+    @staticmethod
+    def to_json(index: Dict) -> Dict:
+        """Return the JSON form of an index; plain dict entries pass through unchanged."""
+        return {**index, "files": [entry.to_dict() if isinstance(entry, IndexEntry) else entry
+                                   for entry in index["files"]]}
+
+    def _create_entry(self, data: Dict, filename: str, created_at: str,
+                      content_sha: Optional[str] = None) -> IndexEntry:
+        """Create an index entry from agent data, stamped with created_at."""
+        # Get ID from filename (remove .yaml extension)
+        agent_id = os.path.splitext(filename)[0]
+
+        return IndexEntry(
+            id=agent_id,
+            name=data["name"],
+            filename=filename,
+            description=data["description"],
+            emoji=data["emoji"],
+            created_at=created_at,
+            tags=tuple(data["tags"]),
+            # Optional author field, only kept if non-empty
+            author=data.get("author") or None,
+            content_sha=content_sha
+        )
+
+    @staticmethod
+    def _content_sha(data: Dict, filename: str) -> str:
+        """Hash the canonical JSON form of an agent's data and filename."""
+        return IndexGenerator._digest([filename, data])
+
+    def generate_index(self, agents: Iterable[Tuple[Dict, str]]) -> Tuple[Dict, int, int]:
         """
         Generate new index from validated agent data.
+        Consumes (data, filename) pairs lazily, so a streaming validator can feed it directly.
+        The returned index holds IndexEntry objects in "files"; see to_json.
         Returns: (new_index, added_count, updated_count)
         """
         # Load existing index if it exists
         existing_index = {}
         try:
             with open('agent_index.json', 'r', encoding='utf-8') as f:
-                existing_index = json.load(f)
+                existing_index = json_io.loads(f.read())
         except (FileNotFoundError, json.JSONDecodeError):
             existing_index = {"version": self.version,
                               "total_agents": 0, "files": []}
@@ -53,42 +139,77 @@ class IndexGenerator:
         # Create new index
         new_index = {
             "version": self.version,
-            "total_agents": len(valid_files),
+            "total_agents": 0,
             "files": []
         }
 
         added_count = 0
         updated_count = 0
 
+        # Timestamp for new entries, formatted once per run
+        now_iso = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+        # Index existing entries by ID for constant-time lookups
+        existing_by_id = {entry["id"]: entry
+                          for entry in existing_index.get("files", [])}
+
         # Process each valid agent
-        for data, filename in zip(valid_data, valid_files):
-            new_entry = self._create_entry(data, filename)
+        for data, filename in agents:
+            agent_id = os.path.splitext(filename)[0]
+            content_sha = self._content_sha(data, filename)
 
             # Check if agent already exists
-            existing_entry = next(
-                (entry for entry in existing_index.get("files", [])
-                 if entry["id"] == new_entry["id"]),
-                None
-            )
+            existing_entry = existing_by_id.get(agent_id)
+
+            # Unchanged agents keep their existing entry as-is
+            if existing_entry and existing_entry.get("content_sha") == content_sha:
+                updated_count += 1
+                new_index["files"].append(IndexEntry.from_dict(existing_entry))
+                continue
 
             if existing_entry:
                 # Preserve creation timestamp for existing entries
-                new_entry["created_at"] = existing_entry["created_at"]
+                created_at = existing_entry["created_at"]
                 updated_count += 1
             else:
+                created_at = now_iso
                 added_count += 1
 
-            new_index["files"].append(new_entry)
+            new_index["files"].append(self._create_entry(
+                data, filename, created_at, content_sha))
+
+        new_index["total_agents"] = len(new_index["files"])
 
         # Sort entries by ID for consistency
-        new_index["files"].sort(key=lambda x: x["id"])
+        new_index["files"].sort(key=_ID_KEY)
+
+        # Only revalidate when the index differs from the last validated one
+        index_json = self.to_json(new_index)
+        fingerprint = self._fingerprint(index_json)
+        if fingerprint != self._last_validated_fingerprint:
+            try:
+                self._validator.validate(index_json)
+            except ValidationError as e:
+                raise ValueError(f"Generated index does not match schema: {e.message}")
+            self._last_validated_fingerprint = fingerprint
 
         return new_index, added_count, updated_count
 
     def save_index(self, index: Dict, filepath: str) -> None:
         """Save index to JSON file."""
         try:
+            # Serialize up front so the file is written in a single call
+            payload = json_io.dumps(self.to_json(index))
             with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(index, f, indent=2, ensure_ascii=False)
+                f.write(payload)
         except Exception as e:
             raise IOError(f"Error saving index: {e}")
+
+        # Persisting the fingerprint is best-effort; a missing file only
+        # means the next run validates again
+        if self._last_validated_fingerprint is not None:
+            try:
+                with open(self.fingerprint_path, 'w', encoding='utf-8') as f:
+                    f.write(self._last_validated_fingerprint)
+            except OSError:
+                pass
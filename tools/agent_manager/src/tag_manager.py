@@ -1,10 +1,21 @@
 #!/usr/bin/env python3
 
-import json
-from typing import Dict, List, Set
+import json_io
+from functools import lru_cache
+from typing import Dict, FrozenSet, List
 import os
 
 
+@lru_cache(maxsize=8)
+def _read_tags(tags_file: str, mtime_ns: int) -> Dict:
+    """Parse a tags definition file, memoized by path and modification time."""
+    with open(tags_file, 'r', encoding='utf-8') as f:
+        data = json_io.loads(f.read())
+    if not isinstance(data, dict) or 'tags' not in data:
+        raise ValueError("Invalid tags file format")
+    return data['tags']
+
+
 class TagManager:
     """Manages and validates agent tags."""
 
@@ -16,25 +27,38 @@ class TagManager:
     def _load_tags(self) -> Dict:
         """Load tags from JSON file."""
         try:
-            with open(self.tags_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if not isinstance(data, dict) or 'tags' not in data:
-                    raise ValueError("Invalid tags file format")
-                return data['tags']
+            tags = _read_tags(self.tags_file, os.stat(self.tags_file).st_mtime_ns)
+            # Derived lookups are built here so a malformed definition is
+            # reported as a loading error
+            self._valid_tags = frozenset(tags.keys())
+            self._tags_by_example = self._index_examples(tags)
+            return tags
         except Exception as e:
             raise ValueError(f"Error loading tags: {e}")
 
-    def get_valid_tags(self) -> Set[str]:
+    @staticmethod
+    def _index_examples(tags: Dict) -> Dict[str, List[str]]:
+        """Map each example name to the tag keys that list it."""
+        by_example = {}
+        for key, info in tags.items():
+            examples = info.get('examples', [])
+            # Only lists of names are indexed
+            if not isinstance(examples, list):
+                continue
+            for example in set(examples):
+                by_example.setdefault(example, []).append(key)
+        return by_example
+
+    def get_valid_tags(self) -> FrozenSet[str]:
         """Get set of valid tag keys."""
-        return set(self.tags.keys())
+        return self._valid_tags
 
     def validate_tags(self, tags: List[str]) -> bool:
         """
         Validate a list of tags against known valid tags.
         Returns True if all tags are valid, False otherwise.
         """
-        valid_tags = self.get_valid_tags()
-        return all(tag in valid_tags for tag in tags)
+        return self._valid_tags.issuperset(tags)
 
     def get_tag_info(self, tag: str) -> Dict:
         """Get information about a specific tag."""
@@ -57,8 +81,4 @@ class TagManager:
         Find potential tags for an agent based on example matches.
         Returns a list of tag keys where the agent name matches an example.
         """
-        matching_tags = []
-        for tag_key, tag_info in self.tags.items():
-            if 'examples' in tag_info and agent_name in tag_info['examples']:
-                matching_tags.append(tag_key)
-        return matching_tags
+        return list(self._tags_by_example.get(agent_name, []))
@@ -2,9 +2,11 @@
 
 import sys
 import argparse
+import logging
 from validator import AgentValidator
 from generator import IndexGenerator
-import os
+
+logger = logging.getLogger(__name__)
 
 
 def update_index(json_schema_path: str, yaml_schema_path: str, tag_definitions_path: str = None) -> None:
@@ -25,41 +27,36 @@ def update_index(json_schema_path: str, yaml_schema_path: str, tag_definitions_p
         # Validate all YAML files
         agents_dir = 'agents'
 
-        # Debug: List all files in the agents directory
-        print("\nDebug: Files in agents directory:")
-        for f in os.listdir(agents_dir):
-            print(f"  - {f}")
-
-        valid_data, valid_files, error_count = validator.validate_directory(
-            agents_dir)
+        error_count = 0
 
-        # Debug: Show validation results details
-        print("\nDebug: Validation results:")
-        print(f"  Valid files count: {len(valid_files)}")
-        print(f"  Valid files: {', '.join(valid_files)}")
-        print(f"  Error count: {error_count}")
-
-        if not valid_files:
-            print("No valid agent files found to process.", file=sys.stderr)
-            sys.exit(1)
+        def valid_agents():
+            """Stream (data, filename) pairs for valid files, counting failures."""
+            nonlocal error_count
+            for filename, data, is_valid in validator.iter_validated(agents_dir):
+                if is_valid:
+                    yield data, filename
+                else:
+                    error_count += 1
 
-        # Generate new index
+        # Validate and generate the new index in a single pass
         try:
             new_index, added_count, updated_count = generator.generate_index(
-                valid_data, valid_files)
-
-            # Add author field for entries where it exists in YAML
-            for i, (data, filename) in enumerate(zip(valid_data, valid_files)):
-                if 'author' in data and data['author']:
-                    # Find the corresponding entry in the index
-                    for entry in new_index['files']:
-                        if entry['filename'] == filename:
-                            entry['author'] = data['author']
-                            break
-
+                valid_agents())
         except ValueError as e:
             print(f"Error generating index: {e}", file=sys.stderr)
             sys.exit(1)
+        finally:
+            validator.close()
+
+        valid_files = [entry.filename for entry in new_index['files']]
+
+        logger.debug("Validation results: %d valid files, %d errors",
+                     len(valid_files), error_count)
+        logger.debug("Valid files: %s", ', '.join(valid_files))
+
+        if not valid_files:
+            print("No valid agent files found to process.", file=sys.stderr)
+            sys.exit(1)
 
         # Save the updated index
         try:
@@ -92,8 +89,14 @@ def main():
                         help='Path to YAML schema file')
     parser.add_argument('--tag-definitions', required=False,
                         help='Path to tag definitions JSON file')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='Enable debug output')
     args = parser.parse_args()
 
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format='%(levelname)s: %(message)s')
+
     update_index(args.schema, args.yaml_schema, args.tag_definitions)
 
 
@@ -1,77 +1,195 @@
 #!/usr/bin/env python3
 
 import yaml
-import yamale
-from typing import Dict, List, Tuple
-from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple
 import os
+import re
 import sys
-import argparse
+import time
+import hashlib
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from yaml_writer import YAMLWriter
 from tag_manager import TagManager
+from yaml_loader import AgentLoader, intern_strings
+import json_io
+
+if TYPE_CHECKING:
+    import yamale
+
+# Bump when validation rules change so cached verdicts are discarded
+_CACHE_VERSION = 2
+
+# Agent IDs are taken from filenames, so filenames must fit the index schema
+_AGENT_FILENAME_RE = re.compile(r'[a-z_]+\.ya?ml\Z')
+
+
+def _file_digest(path: str) -> str:
+    """Hash a file's bytes."""
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=8)
+def _make_schema(schema_path: str, mtime_ns: int) -> "yamale.schema.Schema":
+    """Compile a yamale schema, memoized by path and modification time."""
+    # yamale is imported on first use to keep CLI startup light
+    import yamale
+    return yamale.make_schema(schema_path)
+
+
+# Per-process validator used by directory validation worker processes
+_worker_validator = None
+
+
+def _init_worker(yaml_schema_path: str, tag_definitions_path: str, suggest_tags: bool) -> None:
+    """Build the worker process's validator once; errors are returned, not logged."""
+    global _worker_validator
+    _worker_validator = AgentValidator(
+        yaml_schema_path, tag_definitions_path, error_log_path=None, cache_path=None,
+        suggest_tags=suggest_tags)
+
+
+def _validate_one(filepath: str) -> Tuple[Dict, bool, List[str], List[Tuple[str, str]], List[Tuple[str, List[str]]]]:
+    """
+    Validate one file in a worker process.
+    Returns: (data, is_valid, error_log_lines, errors, tag_suggestions)
+    """
+    data, is_valid = _worker_validator.validate_yaml(filepath)
+    errors, _worker_validator.errors = _worker_validator.errors, []
+    suggestions, _worker_validator.tag_suggestions = _worker_validator.tag_suggestions, []
+    return data, is_valid, _worker_validator.take_deferred_errors(), errors, suggestions
 
 
 class AgentValidator:
-    def __init__(self, yaml_schema_path: str, tag_definitions_path: str = None, error_log_path: str = "sync_errors.log"):
-        """Initialize validator with schema, tag definitions path, and error log path.
+    def __init__(self, yaml_schema_path: str, tag_definitions_path: str = None, error_log_path: str = "sync_errors.log",
+                 cache_path: str = ".agent_validate_cache.json", suggest_tags: bool = False):
+        """Initialize validator with schema, tag definitions path, error log path and cache path.
 
         Args:
             yaml_schema_path: Path to the YAML schema file for validation
             tag_definitions_path: Path to the tag definitions JSON file. If None, will look for
                                   'agent_tag_definitions.json' in the same directory as the schema.
-            error_log_path: Path to write error logs to
+            error_log_path: Path to write error logs to. If None, log lines are held in
+                            memory until collected with take_deferred_errors(), and
+                            errors are not printed; whoever collects them prints them.
+            cache_path: Path of the directory validation cache. If None, caching is disabled.
+            suggest_tags: Collect tag suggestions for agents that are missing tags.
         """
         self.error_log_path = error_log_path
+        self.cache_path = cache_path
+        self.suggest_tags = suggest_tags
+        # (agent name, suggested tags) pairs, printed together by print_tag_suggestions()
+        self.tag_suggestions: List[Tuple[str, List[str]]] = []
+        self._deferred_errors = []
+        # (filename, error) pairs logged by this validator, so callers can report
+        # this run's errors without reading back the whole error log
+        self.errors: List[Tuple[str, str]] = []
+        # Error log handle, opened lazily on the first error and kept open
+        self._error_log_file = None
         try:
-            self.yaml_schema = yamale.make_schema(yaml_schema_path)
+            self.yaml_schema = _make_schema(
+                yaml_schema_path, os.stat(yaml_schema_path).st_mtime_ns)
 
             # Use provided tag definitions path or default to looking in schema directory
             if tag_definitions_path is None:
                 tag_definitions_path = os.path.join(
                     os.path.dirname(yaml_schema_path), 'agent_tag_definitions.json')
 
+            # Kept so worker processes can build an identical validator
+            self.yaml_schema_path = yaml_schema_path
+            self.tag_definitions_path = tag_definitions_path
             self.tag_manager = TagManager(tag_definitions_path)
+            self._valid_tags_set = self.tag_manager.get_valid_tags()
+
+            # Cache key, computed by _load_cache only when the cache is used
+            self._cache_key = None
         except Exception as e:
             raise ValueError(f"Error initializing validator: {e}")
 
     def log_error(self, filename: str, error: str) -> None:
         """Log an error with timestamp."""
-        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        t = time.gmtime()
+        timestamp = '%04d-%02d-%02dT%02d:%02d:%02dZ' % (
+            t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, t.tm_min, t.tm_sec)
+        self.errors.append((filename, error))
+        self._write_error_lines([f"[{timestamp}] {filename}: {error}\n"])
+
+    def _report_error(self, filename: str, error: str) -> None:
+        """Log an error and print it, unless errors are deferred for a parent process."""
+        self.log_error(filename, error)
+        if self.error_log_path is not None:
+            print(f"Error: {error}")
+
+    def _write_error_lines(self, lines: List[str]) -> None:
+        """Append formatted lines to the error log, or defer them if there is no log path."""
+        if self.error_log_path is None:
+            self._deferred_errors.extend(lines)
+            return
         try:
-            with open(self.error_log_path, 'a', encoding='utf-8') as f:
-                f.write(f"[{timestamp}] {filename}: {error}\n")
+            if self._error_log_file is None:
+                self._error_log_file = open(
+                    self.error_log_path, 'a', encoding='utf-8', buffering=1 << 16)
+            self._error_log_file.writelines(lines)
         except IOError as e:
             print(
                 f"Warning: Could not write to error log: {e}", file=sys.stderr)
 
+    def take_deferred_errors(self) -> List[str]:
+        """Return and clear log lines held back because there is no log path."""
+        lines, self._deferred_errors = self._deferred_errors, []
+        return lines
+
+    def flush(self) -> None:
+        """Flush buffered error log lines to disk."""
+        if self._error_log_file is not None:
+            self._error_log_file.flush()
+
+    def close(self) -> None:
+        """Flush and close the error log. It is reopened if more errors are logged."""
+        if self._error_log_file is not None:
+            self._error_log_file.close()
+            self._error_log_file = None
+
+    def __enter__(self) -> "AgentValidator":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
     def validate_yaml(self, filepath: str) -> Tuple[Dict, bool]:
         """Validate a single YAML file against schema."""
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
+            # Keep line endings as-is so the content can be compared with
+            # the normalized output below
+            with open(filepath, 'r', encoding='utf-8', newline='') as f:
                 file_content = f.read()
 
+            if not _AGENT_FILENAME_RE.match(os.path.basename(filepath)):
+                error_msg = ("Invalid filename: use only lowercase letters and underscores, "
+                             "with a .yaml or .yml extension")
+                self._report_error(filepath, error_msg)
+                return None, False
+
             try:
-                data = yaml.safe_load(file_content)
+                data = yaml.load(file_content, Loader=AgentLoader)
             except yaml.YAMLError as e:
                 error_msg = f"YAML parsing error: {str(e)}"
-                self.log_error(filepath, error_msg)
-                print(f"Error: {error_msg}")
+                self._report_error(filepath, error_msg)
                 return None, False
 
             if not isinstance(data, dict):
                 error_msg = "YAML file must contain a dictionary"
-                self.log_error(filepath, error_msg)
-                print(f"Error: {error_msg}")
+                self._report_error(filepath, error_msg)
                 return None, False
 
             try:
-                # Validate against schema
-                try:
-                    yamale.validate(self.yaml_schema, [(data, filepath)])
-                except ValueError as e:
-                    error_msg = f"YAML schema validation error: {str(e)}"
-                    self.log_error(filepath, error_msg)
-                    print(f"Error: {error_msg}")
+                # Validate against schema. The compiled schema is called directly;
+                # yamale.validate only loops over it and wraps failures in an exception.
+                result = self.yaml_schema.validate(data, filepath, True)
+                if not result.isValid():
+                    error_msg = f"YAML schema validation error: {result}"
+                    self._report_error(filepath, error_msg)
 
                     # Check for specific common schema validation issues
                     required_fields = ['name', 'emoji', 'description', 'system_message',
@@ -80,8 +198,15 @@ class AgentValidator:
                         field for field in required_fields if field not in data]
                     if missing_fields:
                         missing_error = f"Missing required fields: {', '.join(missing_fields)}"
-                        self.log_error(filepath, missing_error)
-                        print(f"Error: {missing_error}")
+                        self._report_error(filepath, missing_error)
+
+                    # Suggest tags if none provided but has name
+                    if self.suggest_tags and 'tags' not in data and 'name' in data:
+                        suggested_tags = self.tag_manager.get_tags_by_example(
+                            data['name'])
+                        if suggested_tags:
+                            self.tag_suggestions.append(
+                                (data['name'], suggested_tags))
 
                     return None, False
 
@@ -92,83 +217,187 @@ class AgentValidator:
                     field for field in required_fields if field not in data]
                 if missing_fields:
                     error_msg = f"Missing required fields: {', '.join(missing_fields)}"
-                    self.log_error(filepath, error_msg)
-                    print(f"Error: {error_msg}")
+                    self._report_error(filepath, error_msg)
                     return None, False
 
                 # Validate tags
                 if 'tags' in data:
                     if not isinstance(data['tags'], list):
                         error_msg = "'tags' field must be a list"
-                        self.log_error(filepath, error_msg)
-                        print(f"Error: {error_msg}")
+                        self._report_error(filepath, error_msg)
                         return None, False
                     elif not self.tag_manager.validate_tags(data['tags']):
                         invalid_tags = [t for t in data['tags']
-                                        if t not in self.tag_manager.get_valid_tags()]
+                                        if t not in self._valid_tags_set]
                         error_msg = f"Invalid tags: {', '.join(invalid_tags)}"
-                        self.log_error(filepath, error_msg)
-                        print(f"Error: {error_msg}")
+                        self._report_error(filepath, error_msg)
                         return None, False
                 else:
                     error_msg = "Missing required field: tags"
-                    self.log_error(filepath, error_msg)
-                    print(f"Error: {error_msg}")
+                    self._report_error(filepath, error_msg)
                     return None, False
 
-                # Suggest tags if none provided but has name (this should not happen anymore)
-                if 'tags' not in data and 'name' in data:
-                    suggested_tags = self.tag_manager.get_tags_by_example(
-                        data['name'])
-                    if suggested_tags:
-                        print(
-                            f"Suggested tags for {data['name']}: {', '.join(suggested_tags)}")
-
-                # Only write the file if validation was successful
-                YAMLWriter.write_file(filepath, data)
+                # Only write the file if validation was successful and
+                # normalizing it actually changes its content
+                YAMLWriter.write_file_if_changed(filepath, data, file_content)
                 return data, True
 
             except ValueError as e:
                 error_msg = f"YAML schema validation error: {str(e)}"
-                self.log_error(filepath, error_msg)
-                print(f"Error: {error_msg}")
+                self._report_error(filepath, error_msg)
                 return None, False
 
         except yaml.YAMLError as e:
             error_msg = f"YAML parsing error: {str(e)}"
-            self.log_error(filepath, error_msg)
-            print(f"Error: {error_msg}")
+            self._report_error(filepath, error_msg)
             return None, False
         except FileNotFoundError:
             error_msg = "File not found"
-            self.log_error(filepath, error_msg)
-            print(f"Error: {error_msg}")
+            self._report_error(filepath, error_msg)
             return None, False
         except Exception as e:
             error_msg = f"Unexpected error: {str(e)}"
-            self.log_error(filepath, error_msg)
-            print(f"Error: {error_msg}")
+            self._report_error(filepath, error_msg)
             return None, False
 
-    def validate_directory(self, directory: str) -> Tuple[List[Dict], List[str], int]:
+    def _load_cache(self) -> Dict[str, Dict]:
+        """Load cached results of valid files, keyed by file path."""
+        if self.cache_path is None:
+            return {}
+        try:
+            # Cached verdicts are only reused while schema and tags are unchanged
+            if self._cache_key is None:
+                self._cache_key = {
+                    "version": _CACHE_VERSION,
+                    "schema": _file_digest(self.yaml_schema_path),
+                    "tags": _file_digest(self.tag_definitions_path),
+                }
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json_io.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(cache, dict) or cache.get("key") != self._cache_key:
+            return {}
+        return cache.get("files", {})
+
+    def _save_cache(self, files: Dict[str, Dict]) -> None:
+        """Persist cached results. Failures only cost a full validation next run."""
+        if self.cache_path is None or self._cache_key is None:
+            return
+        try:
+            payload = json_io.dumps({"key": self._cache_key, "files": files})
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def iter_validated(self, directory: str) -> Iterator[Tuple[str, Dict, bool]]:
         """
-        Validate all YAML files in a directory.
-        Returns: (valid_data_list, valid_files, error_count)
+        Validate all YAML files in a directory, yielding results as they complete.
+        Yields: (filename, data, is_valid) in sorted filename order
         """
         if not os.path.exists(directory):
             raise FileNotFoundError(f"Directory not found: {directory}")
 
-        # Check for both .yaml and .yml file extensions
-        yaml_files = sorted(
-            [f for f in os.listdir(directory) if f.endswith(('.yaml', '.yml'))])
+        # Check for both .yaml and .yml file extensions; scandir reports the
+        # entry type without an extra stat per file
+        with os.scandir(directory) as entries:
+            yaml_files = sorted(
+                entry.name for entry in entries
+                if entry.name.endswith(('.yaml', '.yml'))
+                and entry.is_file())
+
+        # Files that were valid last run and whose size and mtime are unchanged
+        # reuse the cached data without being parsed again. Invalid files are
+        # never cached so their errors are reported on every run.
+        cached = self._load_cache()
+        cache_hits = {}
+        pending = []
+        pending_stats = {}
+        for filename in yaml_files:
+            filepath = os.path.join(directory, filename)
+            entry = cached.get(filepath)
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                # Gone since the scan; validate_yaml reports it
+                pending.append(filepath)
+                continue
+            if (entry and entry.get("size") == stat.st_size
+                    and entry.get("mtime_ns") == stat.st_mtime_ns):
+                cache_hits[filename] = entry
+            else:
+                pending.append(filepath)
+                pending_stats[filepath] = (stat.st_size, stat.st_mtime_ns)
+
+        # Keep entries for other directories sharing the cache file
+        norm_directory = os.path.normpath(directory)
+        new_cache = {path: entry for path, entry in cached.items()
+                     if os.path.normpath(os.path.dirname(path)) != norm_directory}
+
+        # Files are independent, so validate them in worker processes to get
+        # past the GIL; map() keeps results in sorted filename order. Workers
+        # hand back their log lines so only this process writes the error log.
+        executor = None
+        results = iter(())
+        if pending:
+            executor = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                initializer=_init_worker,
+                initargs=(self.yaml_schema_path, self.tag_definitions_path,
+                          self.suggest_tags))
+            results = executor.map(_validate_one, pending, chunksize=16)
+        try:
+            for filename in yaml_files:
+                filepath = os.path.join(directory, filename)
+                # Data reaching this process is unpickled or read from JSON, so
+                # intern it here for repeated tags and colors to share one object
+                if filename in cache_hits:
+                    entry = cache_hits[filename]
+                    entry["data"] = intern_strings(entry["data"])
+                    new_cache[filepath] = entry
+                    yield filename, entry["data"], True
+                    continue
+
+                data, is_valid, error_lines, errors, suggestions = next(results)
+                data = intern_strings(data)
+                if error_lines:
+                    self._write_error_lines(error_lines)
+                # Workers leave printing to this process so output follows file order
+                for _, error in errors:
+                    print(f"Error: {error}")
+                self.errors.extend(errors)
+                self.tag_suggestions.extend(suggestions)
+                if is_valid and filepath in pending_stats:
+                    # Files rewritten by validation are cached on the next run,
+                    # once their data reflects the normalized content
+                    size, mtime_ns = pending_stats[filepath]
+                    try:
+                        stat = os.stat(filepath)
+                    except OSError:
+                        stat = None
+                    if stat is not None and (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns):
+                        new_cache[filepath] = {"size": size,
+                                               "mtime_ns": mtime_ns, "data": data}
+                yield filename, data, is_valid
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        # One flush per directory run rather than one write per error
+        self.flush()
+        self._save_cache(new_cache)
+
+    def validate_directory(self, directory: str) -> Tuple[List[Dict], List[str], int]:
+        """
+        Validate all YAML files in a directory.
+        Returns: (valid_data_list, valid_files, error_count)
+        """
         valid_data = []
         valid_files = []
         error_count = 0
 
-        for filename in yaml_files:
-            filepath = os.path.join(directory, filename)
-            data, is_valid = self.validate_yaml(filepath)
-
+        for filename, data, is_valid in self.iter_validated(directory):
             if is_valid:
                 valid_data.append(data)
                 valid_files.append(filename)
@@ -187,9 +416,18 @@ class AgentValidator:
             # Plain text format
             print(f"Error in {filename}: {error}")
 
+    def print_tag_suggestions(self) -> None:
+        """Print the collected tag suggestions in a single write."""
+        if self.tag_suggestions:
+            sys.stdout.write("".join(
+                f"Suggested tags for {name}: {', '.join(tags)}\n"
+                for name, tags in self.tag_suggestions))
+
 
 def main():
     """Command line interface for the validator."""
+    import argparse
+
     parser = argparse.ArgumentParser(
         description='Validate agent YAML files against schema')
     parser.add_argument('--yaml-schema', required=True,
@@ -205,6 +443,8 @@ def main():
                         help='Output format for validation results')
     parser.add_argument('--verbose', action='store_true',
                         help='Enable verbose output with detailed error information')
+    parser.add_argument('--suggest-tags', action='store_true',
+                        help='Suggest tags for agents that are missing them')
 
     args = parser.parse_args()
 
@@ -216,12 +456,14 @@ def main():
         validator = AgentValidator(
             args.yaml_schema,
             tag_definitions_path=args.tag_definitions,
-            error_log_path=args.error_log
+            error_log_path=args.error_log,
+            suggest_tags=args.suggest_tags
         )
 
         if args.file:
             # Validate a single file
             data, is_valid = validator.validate_yaml(args.file)
+            validator.close()
 
             if is_valid:
                 print(f"✓ {args.file} is valid")
@@ -230,24 +472,17 @@ def main():
                 print(f"\n❌ VALIDATION FAILED: {args.file}")
                 print("==================================================")
 
-                # Collect all errors for this file
+                # Collect all errors logged for this file during this run
                 errors = []
-                try:
-                    with open(args.error_log, 'r') as error_log:
-                        for line in error_log:
-                            if args.file in line:
-                                # Extract just the error message
-                                error_msg = line.split(':', 2)[-1].strip()
-                                if error_msg not in errors:  # Avoid duplicates
-                                    errors.append(error_msg)
-                except Exception as e:
-                    errors.append(f"Error reading log: {str(e)}")
-
-                # If no errors found in log, do additional checks
+                for filename, error_msg in validator.errors:
+                    if filename == args.file and error_msg not in errors:  # Avoid duplicates
+                        errors.append(error_msg)
+
+                # If no errors were logged, do additional checks
                 if not errors:
                     try:
                         with open(args.file, 'r') as f:
-                            file_data = yaml.safe_load(f)
+                            file_data = yaml.load(f, Loader=AgentLoader)
 
                         # Check basic structure
                         if not isinstance(file_data, dict):
@@ -270,7 +505,7 @@ def main():
                                         "'tags' field must be a list")
                                 elif not validator.tag_manager.validate_tags(file_data['tags']):
                                     invalid_tags = [t for t in file_data['tags']
-                                                    if t not in validator.tag_manager.get_valid_tags()]
+                                                    if t not in validator._valid_tags_set]
                                     errors.append(
                                         f"Invalid tags: {', '.join(invalid_tags)}")
                             else:
@@ -290,23 +525,30 @@ def main():
                 else:
                     print("  Error: Unknown validation failure")
 
+                validator.print_tag_suggestions()
+
                 print("\n==================================================")
                 sys.exit(1)
 
         elif args.directory:
-            # Validate all files in a directory
-            valid_data, valid_files, error_count = validator.validate_directory(
-                args.directory)
+            # Validate all files in a directory, counting results as they stream
+            valid_count = 0
+            error_count = 0
+            for _, _, is_valid in validator.iter_validated(args.directory):
+                if is_valid:
+                    valid_count += 1
+                else:
+                    error_count += 1
+            validator.close()
 
             print(
-                f"Validation complete: {len(valid_files)} valid files, {error_count} errors")
+                f"Validation complete: {valid_count} valid files, {error_count} errors")
+            validator.print_tag_suggestions()
 
             if args.verbose and error_count > 0:
                 print("\nError details:")
-                with open(args.error_log, 'r') as error_log:
-                    for line in error_log:
-                        if args.directory in line:
-                            print(f"  {line.strip()}")
+                for filename, error_msg in validator.errors:
+                    print(f"  {filename}: {error_msg}")
 
             if error_count > 0:
                 sys.exit(1)
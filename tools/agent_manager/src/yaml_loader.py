@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+import sys
+from collections.abc import Hashable
+import yaml
+from yaml.constructor import ConstructorError, SafeConstructor
+
+# Prefer the libyaml-backed loader when PyYAML was built with it
+_BaseLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Scalars shorter than this (tags, colors, field names) are interned
+_INTERN_MAX_LEN = 64
+
+
+def intern_strings(value):
+    """
+    Intern short strings in loaded data, recursing into dicts and lists.
+    Used for data that arrives unpickled or from JSON rather than through AgentLoader.
+    """
+    if type(value) is str:
+        return sys.intern(value) if len(value) < _INTERN_MAX_LEN else value
+    if type(value) is dict:
+        return {intern_strings(k): intern_strings(v) for k, v in value.items()}
+    if type(value) is list:
+        return [intern_strings(v) for v in value]
+    return value
+
+
+class AgentLoader(_BaseLoader):
+    """
+    Safe loader trimmed to the types agent and definition files use.
+    Mapping keys and short string values are interned so repeated field names,
+    tags and colors share one string object across files.
+    """
+
+    # Only keep constructors for plain scalars, sequences and mappings. Timestamps
+    # stay so unquoted dates still load the same way and fail schema validation.
+    yaml_constructors = {
+        tag: SafeConstructor.yaml_constructors[tag]
+        for tag in (
+            'tag:yaml.org,2002:null',
+            'tag:yaml.org,2002:bool',
+            'tag:yaml.org,2002:int',
+            'tag:yaml.org,2002:float',
+            'tag:yaml.org,2002:timestamp',
+            'tag:yaml.org,2002:str',
+            'tag:yaml.org,2002:seq',
+            'tag:yaml.org,2002:map',
+            None,
+        )
+    }
+
+    def construct_yaml_str(self, node: yaml.ScalarNode) -> str:
+        """Construct a string scalar, interning it when short."""
+        value = self.construct_scalar(node)
+        if len(value) < _INTERN_MAX_LEN:
+            value = sys.intern(value)
+        return value
+
+    def construct_mapping(self, node: yaml.MappingNode, deep: bool = False) -> dict:
+        """Construct a mapping directly into a dict, interning string keys."""
+        if not isinstance(node, yaml.MappingNode):
+            raise ConstructorError(None, None,
+                                   f"expected a mapping node, but found {node.id}",
+                                   node.start_mark)
+        self.flatten_mapping(node)
+        mapping = {}
+        for key_node, value_node in node.value:
+            key = self.construct_object(key_node, deep=deep)
+            if type(key) is str:
+                key = sys.intern(key)
+            elif not isinstance(key, Hashable):
+                raise ConstructorError("while constructing a mapping", node.start_mark,
+                                       "found unhashable key", key_node.start_mark)
+            mapping[key] = self.construct_object(value_node, deep=deep)
+        return mapping
+
+
+AgentLoader.add_constructor('tag:yaml.org,2002:str', AgentLoader.construct_yaml_str)
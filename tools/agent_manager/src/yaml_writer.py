@@ -2,10 +2,32 @@
 
 import yaml
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, Optional, Tuple
 from collections import OrderedDict
-import tempfile
 import os
+import shutil
+
+
+# Runs of blank lines; a blank line may hold any whitespace except the newline
+_LEADING_BLANK_LINES_RE = re.compile(r'\A(?:[^\S\n]*\n)+')
+_INNER_BLANK_LINES_RE = re.compile(r'\n(?:[^\S\n]*\n)+')
+_TRAILING_BLANK_LINES_RE = re.compile(r'\n[^\S\n]*(?:\n[^\S\n]*)*\Z')
+
+# Strings made of these characters, starting with a word character and with
+# single inner spaces, are emitted as plain scalars unless they resolve to
+# another type (numbers, booleans, null, dates)
+_PLAIN_SCALAR_RE = re.compile(r'[A-Za-z0-9_][A-Za-z0-9_./+\-]*(?: [A-Za-z0-9_./+\-]+)*\Z')
+_STR_TAG = 'tag:yaml.org,2002:str'
+_RESOLVER = yaml.resolver.Resolver()
+
+# Dumper options for agent files: block style, no line wrapping, keys in insertion order
+_DUMP_KWARGS = dict(
+    allow_unicode=True,
+    default_flow_style=False,
+    width=float('inf'),
+    indent=2,
+    sort_keys=False
+)
 
 
 class LiteralString(str):
@@ -13,11 +35,16 @@ class LiteralString(str):
     pass
 
 
+def _represent_ordered_dict(dumper: yaml.Dumper, data: OrderedDict) -> yaml.MappingNode:
+    """Present OrderedDict as a plain mapping, keeping insertion order."""
+    return dumper.represent_mapping('tag:yaml.org,2002:map', data.items())
+
+
 class YAMLWriter:
     """Handles writing YAML files with consistent formatting."""
 
     # Define the standard field order for agent YAML files
-    FIELD_ORDER = [
+    FIELD_ORDER = (
         'name',
         'emoji',
         'description',
@@ -27,7 +54,7 @@ class YAMLWriter:
         'is_default',
         'tags',
         'author'  # Optional field
-    ]
+    )
 
     @staticmethod
     def _literal_presenter(dumper: yaml.Dumper, data: LiteralString) -> yaml.ScalarNode:
@@ -40,43 +67,21 @@ class YAMLWriter:
         # For system_message, use the original style if specified
         if field_name == 'system_message' and system_message_literal_style is not None:
             return system_message_literal_style
-        # Otherwise, use literal block if multiline or long
-        return '\n' in value or len(value) > 80
+        # Otherwise, use literal block if long or multiline
+        return len(value) > 80 or '\n' in value
 
     @staticmethod
     def _normalize_line_breaks(value: str) -> str:
         """
         Normalize consecutive line breaks in text.
         Keeps single line breaks intact.
-        Reduces multiple consecutive line breaks (2+) to a single line break.
+        Reduces each run of blank (or whitespace-only) lines to a single empty line.
         """
-        # Split the text into lines
-        lines = value.split('\n')
-        normalized_lines = []
-
-        # Keep track of consecutive empty lines
-        empty_line_count = 0
-
-        for line in lines:
-            if line.strip() == '':
-                # This is an empty line
-                empty_line_count += 1
-            else:
-                # This is a non-empty line
-                # If we had empty lines before, add one empty line
-                if empty_line_count > 0:
-                    normalized_lines.append('')
-                # Reset counter
-                empty_line_count = 0
-                # Add the current line
-                normalized_lines.append(line)
-
-        # If the text ends with empty lines, preserve one
-        if empty_line_count > 0:
-            normalized_lines.append('')
-
-        # Join the lines back together
-        return '\n'.join(normalized_lines)
+        if not value.strip():
+            return ''
+        value = _LEADING_BLANK_LINES_RE.sub('\n', value)
+        value = _INNER_BLANK_LINES_RE.sub('\n\n', value)
+        return _TRAILING_BLANK_LINES_RE.sub('\n', value)
 
     @staticmethod
     def _prepare_data(data: Dict[str, Any], system_message_literal_style=None) -> OrderedDict:
@@ -84,34 +89,139 @@ class YAMLWriter:
         # Create an ordered dictionary with fields in the correct order
         ordered_data = OrderedDict()
 
-        # Add fields in the specified order
-        for field in YAMLWriter.FIELD_ORDER:
-            if field in data:
-                value = data[field]
-                if isinstance(value, str):
-                    # Normalize line breaks for system_message field
-                    if field == 'system_message':
-                        value = YAMLWriter._normalize_line_breaks(value)
-                    # Check if literal block style should be used
-                    if YAMLWriter._should_use_literal_block(value, field, system_message_literal_style):
-                        ordered_data[field] = LiteralString(value)
-                    else:
-                        ordered_data[field] = value
-                else:
-                    ordered_data[field] = value
+        # Add the fields present in data, in the specified order
+        present = [(f, data[f]) for f in YAMLWriter.FIELD_ORDER if f in data]
+        for field, value in present:
+            if not isinstance(value, str):
+                ordered_data[field] = value
+                continue
+
+            if field == 'system_message':
+                # Normalize line breaks and honor the original style if specified
+                value = YAMLWriter._normalize_line_breaks(value)
+                use_literal = YAMLWriter._should_use_literal_block(
+                    value, field, system_message_literal_style)
+            else:
+                # Use literal block if long or multiline
+                use_literal = len(value) > 80 or '\n' in value
+
+            ordered_data[field] = LiteralString(value) if use_literal else value
 
         return ordered_data
 
+    @staticmethod
+    def _plain_scalar(value: Any) -> Optional[str]:
+        """
+        Return the text the dumper would emit for a trivial scalar (a short
+        plain-safe string or a bool), or None if it needs the full dumper.
+        """
+        if value is True:
+            return 'true'
+        if value is False:
+            return 'false'
+        if (type(value) is str and _PLAIN_SCALAR_RE.match(value)
+                and _RESOLVER.resolve(yaml.ScalarNode, value, (True, False)) == _STR_TAG):
+            return value
+        return None
+
     @staticmethod
     def _format_tags(tags_list):
         """Format tags list with proper indentation."""
         if not tags_list:
             return "tags: []"
 
-        result = "tags:"
-        for tag in tags_list:
-            result += f"\n  - {tag}"
-        return result
+        return "tags:" + "".join(f"\n  - {tag}" for tag in tags_list)
+
+    @staticmethod
+    def render_to_string(data: Dict, system_message_literal_style=None) -> str:
+        """Render data as YAML text with consistent field ordering and formatting."""
+        # Order and mark fields once; everything below walks this mapping
+        final_output = YAMLWriter._prepare_data(
+            data, system_message_literal_style)
+
+        # Build a manually formatted YAML string to ensure proper order and formatting
+        yaml_content = ""
+
+        # Format tags lists and system_message with literal style by hand, and
+        # trivial scalars directly; the remaining fields go through one dump
+        blocks = {}
+        temp_output = OrderedDict()
+        last_field = None
+        for field, value in final_output.items():
+            if field == 'tags' and isinstance(value, list):
+                # Add tags with proper indentation
+                blocks[field] = [YAMLWriter._format_tags(value)]
+                continue
+
+            if field == 'system_message' and system_message_literal_style is True:
+                # Add the already normalized system_message with literal block
+                # style. One join for the whole block; the leading empty item
+                # puts the break and indent before the first line too
+                blocks[field] = ["system_message: |" + "\n  ".join(
+                    [''] + value.split('\n'))]
+                continue
+
+            last_field = field
+            text = YAMLWriter._plain_scalar(value)
+            if text is None:
+                temp_output[field] = value
+            else:
+                blocks[field] = [f"{field}: {text}"]
+
+        if temp_output:
+            yaml_content = yaml.safe_dump(temp_output, **_DUMP_KWARGS)
+            # Trailing whitespace is only trimmed when the dump holds the last
+            # of these fields; otherwise just drop the document's final break
+            if last_field in temp_output:
+                yaml_content = yaml_content.rstrip()
+            else:
+                yaml_content = yaml_content[:-1]
+
+        # Split the dump into per-field blocks in one pass: a field's key line
+        # plus the indented or blank lines that follow it
+        block = None
+        for line in yaml_content.split('\n'):
+            if line.startswith('  ') or not line.strip():
+                if block is not None:
+                    block.append(line)
+            else:
+                field = line.partition(':')[0]
+                if field in temp_output:
+                    block = blocks.setdefault(field, [])
+                    block.append(line)
+                else:
+                    block = None
+
+        # Now assemble the fields in order
+        final_content = ['\n'.join(blocks[field])
+                         for field in final_output if field in blocks]
+
+        return '\n'.join(final_content) + '\n'  # End file with newline
+
+    @staticmethod
+    def _write_atomic(filepath: str, content: str) -> None:
+        """
+        Write content to a temp file beside the real target and rename it over
+        the target, so a failed write never leaves a truncated file behind.
+        Symlinks are followed and an existing file keeps its permission bits.
+        """
+        target = os.path.realpath(filepath)
+        tmp_path = target + '.tmp'
+        # Encode once and write the bytes directly, skipping the text layer;
+        # this also keeps '\n' line endings on every platform
+        payload = content.encode('utf-8')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            if os.path.exists(target):
+                shutil.copymode(target, tmp_path)
+            os.replace(tmp_path, target)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
 
     @staticmethod
     def write_file(filepath: str, data: Dict, system_message_literal_style=None) -> None:
@@ -121,111 +231,45 @@ class YAMLWriter:
             raise IOError("Cannot write None data to YAML file")
 
         try:
-            # Create a new OrderedDict to maintain field order exactly as specified in FIELD_ORDER
-            final_output = OrderedDict()
-
-            # Process each field in the specified order
-            for field in YAMLWriter.FIELD_ORDER:
-                if field in data:
-                    if field == 'tags' and isinstance(data['tags'], list):
-                        # Skip tags for now, we'll handle them specially later
-                        pass
-                    elif field == 'system_message' and system_message_literal_style is True:
-                        # Skip system_message for now if it should use literal style
-                        pass
-                    else:
-                        # Normal processing for all other fields
-                        value = data[field]
-                        if isinstance(value, str):
-                            # Normalize line breaks for system_message field
-                            if field == 'system_message':
-                                value = YAMLWriter._normalize_line_breaks(
-                                    value)
-                            # Check if literal block style should be used
-                            if YAMLWriter._should_use_literal_block(value, field, system_message_literal_style):
-                                final_output[field] = LiteralString(value)
-                            else:
-                                final_output[field] = value
-                        else:
-                            final_output[field] = value
-
-            # Register the literal string presenter
-            yaml.add_representer(
-                LiteralString, YAMLWriter._literal_presenter, Dumper=yaml.SafeDumper)
-
-            # Add representer for OrderedDict to maintain order
-            yaml.add_representer(
-                OrderedDict,
-                lambda dumper, data: dumper.represent_mapping(
-                    'tag:yaml.org,2002:map', data.items()),
-                Dumper=yaml.SafeDumper
-            )
-
-            # Build a manually formatted YAML string to ensure proper order and formatting
-            yaml_content = ""
-
-            # First write all normal fields (not tags or system_message with literal style)
-            temp_output = OrderedDict()
-            for field, value in final_output.items():
-                temp_output[field] = value
+            content = YAMLWriter.render_to_string(
+                data, system_message_literal_style)
+            YAMLWriter._write_atomic(filepath, content)
+        except Exception as e:
+            raise IOError(f"Error writing YAML file: {e}")
+
+    @staticmethod
+    def write_files(items: Iterable[Tuple[str, Dict]], system_message_literal_style=None) -> None:
+        """
+        Write several YAML files from (filepath, data) pairs.
+        Stops at the first file that fails, raising IOError like write_file.
+        """
+        for filepath, data in items:
+            YAMLWriter.write_file(
+                filepath, data, system_message_literal_style)
 
-            if temp_output:
-                yaml_content = yaml.safe_dump(
-                    temp_output,
-                    allow_unicode=True,
-                    default_flow_style=False,
-                    width=float('inf'),
-                    indent=2,
-                    sort_keys=False
-                ).rstrip()
-
-            # Now manually add any special fields in the correct position
-            final_content = []
-
-            for field in YAMLWriter.FIELD_ORDER:
-                if field == 'system_message' and 'system_message' in data and system_message_literal_style is True:
-                    # Add system_message with literal block style
-                    system_message = data['system_message']
-                    normalized_message = YAMLWriter._normalize_line_breaks(
-                        system_message)
-
-                    system_content = "system_message: |"
-                    for line in normalized_message.split('\n'):
-                        system_content += f"\n  {line}"
-
-                    final_content.append(system_content)
-
-                elif field == 'tags' and 'tags' in data and isinstance(data['tags'], list):
-                    # Add tags with proper indentation
-                    tags_content = data['tags']
-                    tags_formatted = YAMLWriter._format_tags(tags_content)
-                    final_content.append(tags_formatted)
-
-                elif field in final_output:
-                    # Extract this field from the yaml_content
-                    field_pattern = f"{field}:"
-                    lines = yaml_content.split('\n')
-                    field_content = []
-
-                    found = False
-                    for i, line in enumerate(lines):
-                        if line.startswith(field_pattern):
-                            found = True
-                            field_content.append(line)
-
-                            # Also add any indented lines that follow this field
-                            j = i + 1
-                            while j < len(lines) and (lines[j].startswith('  ') or not lines[j].strip()):
-                                field_content.append(lines[j])
-                                j += 1
-
-                    if found:
-                        final_content.append('\n'.join(field_content))
-
-            # Write the final content to the file
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(final_content))
-                f.write('\n')  # End file with newline
+    @staticmethod
+    def write_file_if_changed(filepath: str, data: Dict, original: str,
+                              system_message_literal_style=None) -> bool:
+        """
+        Write data to a YAML file only if the rendered text differs from original.
+        Returns True if the file was written.
+        """
+        if data is None:
+            raise IOError("Cannot write None data to YAML file")
 
+        try:
+            content = YAMLWriter.render_to_string(
+                data, system_message_literal_style)
+            if content == original:
+                return False
+            YAMLWriter._write_atomic(filepath, content)
+            return True
         except Exception as e:
             raise IOError(f"Error writing YAML file: {e}")
+
+
+# Register representers once at import rather than on every write
+yaml.add_representer(
+    LiteralString, YAMLWriter._literal_presenter, Dumper=yaml.SafeDumper)
+yaml.add_representer(
+    OrderedDict, _represent_ordered_dict, Dumper=yaml.SafeDumper)